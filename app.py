@@ -7,6 +7,7 @@ from typing import Dict
 import logging
 import sqlite3
 import json
+import sys
 from config import MT5_GATEWAY_CONFIG, WEBSERVER_CONFIG, DATA_CONFIG, BINANCE_CONFIG
 from mt5_gateway import MT5Gateway
 from binance_gateway import BinanceGateway
@@ -19,7 +20,13 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'vnpy-mt5-gateway-secret-key'
-socketio = SocketIO(app, cors_allowed_origins='*', async_mode='threading')
+# 仅当启动脚本已导入eventlet并完成monkey patch时使用eventlet；未导入时不触发eventlet的导入，保持多线程模式
+SOCKETIO_ASYNC_MODE = 'threading'
+if 'eventlet' in sys.modules:
+    from eventlet.patcher import is_monkey_patched
+    if is_monkey_patched('socket'):
+        SOCKETIO_ASYNC_MODE = 'eventlet'
+socketio = SocketIO(app, cors_allowed_origins='*', async_mode=SOCKETIO_ASYNC_MODE)
 
 gateway = None
 binance_gateway = None
@@ -233,8 +240,8 @@ def get_status():
         if gateway:
             mt5_status = gateway.get_status()
             if mt5_status.get('last_update'):
-                last_update = datetime.fromisoformat(mt5_status['last_update'])
-                delay = (datetime.now() - last_update).total_seconds()
+                # MT5网关的last_update为毫秒时间戳
+                delay = (time.time_ns() // 1_000_000 - mt5_status['last_update']) / 1000
                 mt5_status['delay_seconds'] = delay
                 mt5_status['delay_ok'] = delay <= DATA_CONFIG['max_delay_seconds']
 
@@ -1,89 +1,305 @@
 import requests
+from requests.adapters import HTTPAdapter
 import threading
 import time
 import hmac
 import hashlib
 import json
+import re
+from collections import deque
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, Any
+from statistics import median
+from typing import Optional, Dict, Any, Union
+from urllib.parse import urlencode
 import logging
+import numpy as np
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 资产价格缓存有效期（秒）
+PRICE_CACHE_TTL = 0.5
+# 全市场价格表缓存有效期（秒）
+ALL_PRICES_CACHE_TTL = 1.0
+# 行情轮询周期（秒）
+STREAM_INTERVAL = 0.85
+
+# 应用层心跳：间隔、单次超时（秒）、触发重连的连续失败次数、重连退避上限（秒）
+HEARTBEAT_INTERVAL = 25
+HEARTBEAT_TIMEOUT = 10
+HEARTBEAT_MAX_MISSED = 2
+RECONNECT_BACKOFF_MAX = 30
+# 合约WebSocket交易API地址（下单复用同一条长连接），仅对应主网REST地址FUTURES_REST_URL
+FUTURES_REST_URL = "https://fapi.binance.com"
+FUTURES_WS_API_URL = "wss://ws-fapi.binance.com/ws-fapi/v1"
+
+# 限频控制：IP权重上限（每分钟）及提前降速阈值
+FUTURES_WEIGHT_LIMIT_1M = 2400
+SPOT_WEIGHT_LIMIT_1M = 6000
+WEIGHT_THROTTLE_RATIO = 0.85
+# GET请求重试：最多尝试次数及指数退避区间（秒）
+REQUEST_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 3.2
+# 429/418未携带Retry-After时的默认暂停时间（秒）
+DEFAULT_RETRY_AFTER = 1.0
+
+# 账户接口错误信息 -> (错误类型, 提示信息)
+ACCOUNT_ERROR_MAP = {
+    "API-key format invalid": ("Invalid API Key", "API Key格式错误，请检查"),
+    "Invalid API-key": ("Invalid API Key", "API Key格式错误，请检查"),
+    "Signature for this request is not valid": ("Invalid Signature", "API密钥或签名错误，请检查"),
+    "Account has insufficient permissions": ("Insufficient Permissions", "API Key缺少账户读取权限，请在Binance后台开启"),
+    "api-key permissions": ("Insufficient Permissions", "API Key缺少账户读取权限，请在Binance后台开启"),
+}
+# 所有错误关键字编译为单个正则，一次扫描完成匹配
+ACCOUNT_ERROR_RE = re.compile('|'.join(re.escape(pattern) for pattern in ACCOUNT_ERROR_MAP))
+
+
+class _AdaptiveGate:
+    """AIMD并发闸门：限频时乘性收缩并暂停放行，持续低延迟成功时加性扩张"""
+
+    def __init__(self, initial: float = 5.0, minimum: float = 1.0, maximum: float = 10.0,
+                 increase: float = 0.5, decrease: float = 0.5, window: int = 10,
+                 target_latency: float = 1.0):
+        self._cond = threading.Condition()
+        self._limit = initial
+        self._minimum = minimum
+        self._maximum = maximum
+        self._increase = increase
+        self._decrease = decrease
+        self._window = window
+        self._target_latency = target_latency
+        self._in_flight = 0
+        self._successes = 0
+        self._blocked_until = 0.0
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                blocked = self._blocked_until > now
+                if not blocked and self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return True
+                # 暂停期超过等待上限时直接放弃，避免调用方长时间阻塞
+                if now >= deadline or self._blocked_until > deadline:
+                    return False
+                wait_until = self._blocked_until if blocked else deadline
+                self._cond.wait(min(wait_until, deadline) - now)
+
+    def release(self, ok: bool, latency: float):
+        with self._cond:
+            self._in_flight -= 1
+            if ok and latency < self._target_latency:
+                self._successes += 1
+                if self._successes >= self._window:
+                    self._limit = min(self._maximum, self._limit + self._increase)
+                    self._successes = 0
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def back_off(self, seconds: float):
+        with self._cond:
+            self._limit = max(self._minimum, self._limit * self._decrease)
+            self._successes = 0
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
 
 class BinanceGateway:
     def __init__(self, api_key: str, secret_key: str, base_url: str, symbol: str, proxies: dict = None, timeout: int = 30):
         self.api_key = api_key
         self.secret_key = secret_key
+        # 预先完成密钥调度，签名时copy()即可跳过ipad/opad初始化
+        self._hmac_template = hmac.new(secret_key.encode('utf-8'), b'', hashlib.sha256)
         self.base_url = base_url
+        # 根据base_url判断是现货还是合约API，初始化时一次确定各接口路径
+        self._is_futures = 'fapi' in base_url
+        if self._is_futures:
+            self._time_endpoint = '/fapi/v1/time'
+            self._account_endpoint = '/fapi/v2/account'
+            self._api_name = "Binance Futures API"
+        else:
+            self._time_endpoint = '/api/v3/time'
+            self._account_endpoint = '/api/v3/account'
+            self._api_name = "Binance Spot API"
         self.symbol = symbol
+        # 交易对固定不变，预先编码常用查询串
+        self._qs_symbol = urlencode({'symbol': symbol})
+        self._qs_price_cache: Dict[str, str] = {}  # asset -> 'symbol=<asset>USDT'
         self.proxies = proxies or {"http": None, "https": None}
         self.timeout = timeout
         self.connected = False
         self.last_price = None
         self.last_update_time = None
-        self.callbacks = []
+        # 回调以不可变tuple保存：注册/注销时加锁整体替换，行情线程直接读取快照
+        self.callbacks = ()
+        self._callbacks_lock = threading.Lock()
         self.running = False
         self.thread = None
+        self._stop = threading.Event()
+        self._heartbeat_thread = None
+        self._heartbeat_stop = threading.Event()
+        self._rtt = deque(maxlen=32)  # 最近心跳往返时间（毫秒）
+        # 复用TCP/TLS连接；连接池需容纳行情并发请求
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10))
+        self._session.headers.update({
+            'Content-Type': 'application/json',
+            'X-MBX-APIKEY': api_key
+        })
+        self._pool = None
+        self._gate = _AdaptiveGate()
+        self._price_cache: Dict[str, tuple] = {}  # asset -> (price, expiry)
+        self._price_cache_lock = threading.Lock()
+        self._all_prices_cache = ({}, 0.0)  # (symbol -> price, expiry)
+        # 仅在合约主网上启用WebSocket下单，测试网或其他地址一律走REST，避免订单发往主网
+        self._order_ws_url = FUTURES_WS_API_URL if base_url.rstrip('/') == FUTURES_REST_URL else None
+        self._order_ws = None
+        self._order_ws_lock = threading.Lock()
+        self._pending: Dict[str, tuple] = {}  # request id -> (发出请求的连接, Future)
+        # 下单参数结构固定，预生成查询串模板（side, quantity, price, timestamp）
+        self._order_template = (
+            f"symbol={symbol}&side=%s&type=LIMIT&quantity=%s&price=%s&timeInForce=GTC&timestamp=%d"
+        ).encode('utf-8')
+
+    def _sign(self, payload: bytes) -> str:
+        h = self._hmac_template.copy()
+        h.update(payload)
+        return h.hexdigest()
 
     def _generate_signature(self, params: dict) -> str:
-        query_string = '&'.join([f"{key}={value}" for key, value in params.items()])
-        signature = hmac.new(
-            self.secret_key.encode('utf-8'),
-            query_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        return signature
-
-    def _make_request(self, endpoint: str, params: dict = None, signed: bool = False, method: str = "GET") -> Optional[dict]:
-        try:
-            url = f"{self.base_url}{endpoint}"
-            headers = {
-                'Content-Type': 'application/json',
-                'X-MBX-APIKEY': self.api_key
-            }
+        return self._sign(urlencode(params).encode('utf-8'))
 
-            if params is None:
-                params = {}
+    def _send(self, method: str, url: str, params: Union[dict, bytes], signed: bool) -> requests.Response:
+        # 公共请求头已设置在session上，这里只传入需要覆盖的部分
+        kwargs = {}
 
-            if signed:
+        if signed:
+            # 签名与请求发送共用同一份查询串，避免重复序列化
+            if isinstance(params, bytes):
+                # 预编码的查询串（已含timestamp），直接签名
+                query_string = params
+            else:
                 params['timestamp'] = int(time.time() * 1000)
-                params['signature'] = self._generate_signature(params)
-
-            if method.upper() == "POST":
-                response = requests.post(url, headers=headers, json=params, timeout=self.timeout, proxies=self.proxies)
+                query_string = urlencode(params).encode('utf-8')
+            query_string += b'&signature=' + self._sign(query_string).encode('ascii')
+            if method == "POST":
+                kwargs['headers'] = {'Content-Type': 'application/x-www-form-urlencoded'}
+                kwargs['data'] = query_string
             else:
-                response = requests.get(url, headers=headers, params=params, timeout=self.timeout, proxies=self.proxies)
-            
-            response.raise_for_status()
-            return response.json()
+                url = f"{url}?{query_string.decode('utf-8')}"
+        elif method == "POST":
+            kwargs['data'] = _json_dumps(params)
+        elif params:
+            kwargs['params'] = params
 
-        except requests.exceptions.Timeout as e:
-            logger.error(f"Request timeout: {e}")
-            return None
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"Connection error: {e}")
-            return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error: {e}")
-            return None
+        if not self._gate.acquire(self.timeout):
+            raise requests.exceptions.RequestException("Rate limit back-off in effect, request skipped")
+
+        start = time.monotonic()
+        ok = False
+        try:
+            response = self._session.request(method, url, timeout=self.timeout, proxies=self.proxies, **kwargs)
+            ok = response.status_code < 400
+            return response
+        finally:
+            self._gate.release(ok, time.monotonic() - start)
+
+    def _throttle_by_weight(self, response: requests.Response):
+        used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+        if not used:
+            return
+
+        limit = FUTURES_WEIGHT_LIMIT_1M if '/fapi/' in response.url else SPOT_WEIGHT_LIMIT_1M
+        threshold = limit * WEIGHT_THROTTLE_RATIO
+        used = int(used)
+        if used > threshold:
+            # 权重接近上限：按超出比例暂停，最长至当前分钟窗口结束
+            remaining_window = 60 - time.time() % 60
+            pause = remaining_window * min(1.0, (used - threshold) / (limit - threshold))
+            logger.warning(f"Request weight {used}/{limit} near limit, pausing {pause:.2f}s")
+            self._gate.pause(pause)
+
+    def _make_request(self, endpoint: str, params: Union[dict, bytes] = None, signed: bool = False, method: str = "GET") -> Optional[dict]:
+        url = f"{self.base_url}{endpoint}"
+        method = method.upper()
+        if params is None:
+            params = {}
+
+        # 仅对幂等的GET请求做指数退避重试
+        attempts = REQUEST_MAX_ATTEMPTS if method == "GET" else 1
+        delay = RETRY_BASE_DELAY
+        for attempt in range(1, attempts + 1):
+            can_retry = attempt < attempts
+            try:
+                response = self._send(method, url, params, signed)
+
+                if response.status_code in (418, 429):
+                    # 限频(429)或IP封禁(418)：按Retry-After暂停所有请求并收缩并发
+                    retry_after = response.headers.get('Retry-After', '')
+                    retry_after = float(retry_after) if retry_after.isdigit() else DEFAULT_RETRY_AFTER
+                    logger.warning(f"Rate limited by Binance ({response.status_code}), backing off {retry_after}s")
+                    self._gate.back_off(retry_after)
+                    if response.status_code == 429 and can_retry:
+                        continue
+                elif response.status_code >= 500 and can_retry:
+                    logger.warning(f"Server error {response.status_code}, retrying in {delay}s")
+                    time.sleep(delay)
+                    delay = min(delay * 2, RETRY_MAX_DELAY)
+                    continue
+                else:
+                    self._throttle_by_weight(response)
+
+                response.raise_for_status()
+                return _json_loads(response.content)
+
+            except requests.exceptions.Timeout as e:
+                logger.error(f"Request timeout: {e}")
+                return None
+            except requests.exceptions.ConnectionError as e:
+                if can_retry:
+                    logger.warning(f"Connection error, retrying in {delay}s: {e}")
+                    time.sleep(delay)
+                    delay = min(delay * 2, RETRY_MAX_DELAY)
+                    continue
+                logger.error(f"Connection error: {e}")
+                return None
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Request error: {e}")
+                return None
+            except ValueError as e:
+                logger.error(f"Invalid JSON response: {e}")
+                return None
+
+        return None
 
     def connect(self) -> bool:
         try:
-            # 根据base_url判断是现货还是合约API
-            if 'fapi' in self.base_url:
-                # 合约API
-                endpoint = '/fapi/v1/time'
-                api_name = "Binance Futures API"
-            else:
-                # 现货API
-                endpoint = '/api/v3/time'
-                api_name = "Binance Spot API"
-            
-            server_time = self._make_request(endpoint)
+            server_time = self._make_request(self._time_endpoint)
             if server_time and 'serverTime' in server_time:
-                logger.info(f"Connected to {api_name}. Server time: {server_time['serverTime']}")
+                logger.info(f"Connected to {self._api_name}. Server time: {server_time['serverTime']}")
                 self.connected = True
                 return True
             else:
@@ -96,8 +312,20 @@ class BinanceGateway:
 
     def disconnect(self):
         self.running = False
+        self._stop.set()
+        self._heartbeat_stop.set()
         if self.thread:
             self.thread.join(timeout=5)
+        if self._heartbeat_thread and self._heartbeat_thread is not threading.current_thread():
+            self._heartbeat_thread.join(timeout=5)
+        # 先取到局部变量，避免on_close回调在判断与close之间将属性置空
+        order_ws = self._order_ws
+        if order_ws:
+            order_ws.close()
+        if self._pool:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        self._session.close()
         self.connected = False
         logger.info("Disconnected from Binance API")
 
@@ -138,12 +366,8 @@ class BinanceGateway:
         if not self.connected:
             return None
 
-        params = {
-            'symbol': self.symbol
-        }
-
         # 行情模块专用：使用合约API接口
-        data = self._make_request('/fapi/v1/ticker/price', params=params)
+        data = self._make_request(f'/fapi/v1/ticker/price?{self._qs_symbol}')
         if data is None:
             logger.warning(f"Failed to get ticker price for {self.symbol}")
             return None
@@ -159,20 +383,15 @@ class BinanceGateway:
         if not self.connected:
             return None
 
-        params = {
-            'symbol': self.symbol,
-            'limit': 5
-        }
-
-        # 行情模块专用：使用合约API接口
-        data = self._make_request('/fapi/v1/depth', params=params)
+        # 行情模块专用：仅需最优买卖价，使用合约bookTicker接口（单档，响应体更小）
+        data = self._make_request(f'/fapi/v1/ticker/bookTicker?{self._qs_symbol}')
         if data is None:
             logger.warning(f"Failed to get order book for {self.symbol}")
             return None
 
-        if data['bids'] and data['asks']:
-            best_bid = float(data['bids'][0][0])
-            best_ask = float(data['asks'][0][0])
+        best_bid = float(data.get('bidPrice') or 0)
+        best_ask = float(data.get('askPrice') or 0)
+        if best_bid > 0 and best_ask > 0:
             spread = best_ask - best_bid
             spread_percent = (spread / best_bid) * 100
 
@@ -183,8 +402,8 @@ class BinanceGateway:
                 "spread": spread,
                 "spread_percent": spread_percent,
                 "time": datetime.now().isoformat(),
-                "bid_volume": float(data['bids'][0][1]),
-                "ask_volume": float(data['asks'][0][1]),
+                "bid_volume": float(data['bidQty']),
+                "ask_volume": float(data['askQty']),
             }
 
         return None
@@ -194,12 +413,8 @@ class BinanceGateway:
         if not self.connected:
             return None
 
-        params = {
-            'symbol': self.symbol
-        }
-
         # 行情模块专用：使用合约API接口
-        data = self._make_request('/fapi/v1/ticker/24hr', params=params)
+        data = self._make_request(f'/fapi/v1/ticker/24hr?{self._qs_symbol}')
         if data is None:
             logger.warning(f"Failed to get 24h ticker for {self.symbol}")
             return None
@@ -222,20 +437,92 @@ class BinanceGateway:
             return
 
         self.running = True
-        self.thread = threading.Thread(target=self._stream_loop, daemon=True)
+        # 三个行情接口并发请求的线程池；重连时沿用，disconnect时关闭
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix='binance-stream')
+        # 每个行情线程持有独立的停止事件：重连后旧线程即使仍卡在请求中，返回后也会退出，不会与新线程并行
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._stream_loop, args=(self._stop,), daemon=True)
         self.thread.start()
         logger.info("Started Binance price streaming")
 
-    def _stream_loop(self):
-        while self.running and self.connected:
-            ticker = self.get_ticker_price()
-            order_book = self.get_order_book()
-            ticker_24h = self.get_24h_ticker()
+        if self._heartbeat_thread is None or not self._heartbeat_thread.is_alive():
+            self._heartbeat_stop.clear()
+            self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+            self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self):
+        """应用层心跳：定期请求合约服务器时间，连续失败或行情线程退出时自动重连"""
+        missed = 0
+        while not self._heartbeat_stop.wait(HEARTBEAT_INTERVAL):
+            start = time.monotonic()
+            alive = self._ping()
+            if alive:
+                self._rtt.append((time.monotonic() - start) * 1000)
+                missed = 0
+            else:
+                missed += 1
+                logger.warning(f"Heartbeat missed ({missed}/{HEARTBEAT_MAX_MISSED})")
+
+            stream_dead = self.thread is not None and not self.thread.is_alive()
+            if missed >= HEARTBEAT_MAX_MISSED or stream_dead:
+                self._reconnect()
+                missed = 0
+
+    def _ping(self) -> bool:
+        """心跳请求：在心跳线程内直接单次请求合约服务器时间，不经线程池排队与重试，耗时即往返时间"""
+        try:
+            response = self._session.get(f"{self.base_url}/fapi/v1/time", timeout=HEARTBEAT_TIMEOUT, proxies=self.proxies)
+            return response.status_code < 400 and 'serverTime' in _json_loads(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Heartbeat request failed: {e}")
+            return False
+
+    def _reconnect(self):
+        """停止行情线程后按指数退避重连，直到成功或被disconnect中止"""
+        logger.warning("Binance connection lost, reconnecting")
+        self.running = False
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        self.connected = False
+
+        delay = 1
+        while not self._heartbeat_stop.is_set():
+            if self.connect():
+                if self._heartbeat_stop.is_set():
+                    self.connected = False
+                    return
+                self.start_streaming()
+                return
+            logger.warning(f"Reconnect failed, retrying in {delay}s")
+            if self._heartbeat_stop.wait(delay):
+                return
+            delay = min(delay * 2, RECONNECT_BACKOFF_MAX)
+
+    def _stream_loop(self, stop: threading.Event):
+        # 按固定周期调度：扣除请求耗时，disconnect时立即唤醒退出
+        next_tick = time.monotonic()
+        pool = self._pool
+        while not stop.is_set() and self.connected:
+            # 三个行情接口相互独立，并发请求
+            ticker_future = pool.submit(self.get_ticker_price)
+            order_book_future = pool.submit(self.get_order_book)
+            ticker_24h_future = pool.submit(self.get_24h_ticker)
+            ticker = ticker_future.result()
+            order_book = order_book_future.result()
+            ticker_24h = ticker_24h_future.result()
+
+            if stop.is_set():
+                break
 
             if ticker and order_book and ticker_24h:
+                # 数据全部返回后只取一次当前时间，供合并行情的时间戳与last_update_time共用
+                now = datetime.now()
                 combined_data = {
                     **ticker,
                     **order_book,
+                    "time": now.isoformat(),
                     "price_change": ticker_24h["price_change"],
                     "price_change_percent": ticker_24h["price_change_percent"],
                     "high_24h": ticker_24h["high"],
@@ -244,18 +531,20 @@ class BinanceGateway:
                     "open_price": ticker_24h["open"],
                 }
                 self.last_price = combined_data
-                self.last_update_time = datetime.now()
+                self.last_update_time = now
 
-                for callback in self.callbacks:
+                for callback in self.callbacks:  # 引用当前快照，注册/注销不影响本轮遍历
                     try:
                         callback(combined_data)
                     except Exception as e:
                         logger.error(f"Callback error: {e}")
 
-            time.sleep(0.85)
+            next_tick = max(next_tick + STREAM_INTERVAL, time.monotonic())
+            stop.wait(next_tick - time.monotonic())
 
     def add_callback(self, callback):
-        self.callbacks.append(callback)
+        with self._callbacks_lock:
+            self.callbacks = self.callbacks + (callback,)
 
     def get_status(self) -> Dict[str, Any]:
         """获取网关状态"""
@@ -276,23 +565,19 @@ class BinanceGateway:
             logger.error("Not connected to Binance")
             return None
 
-        endpoint = "/fapi/v1/order"
-        params = {
-            "symbol": self.symbol,
-            "side": "BUY" if direction.lower() == "buy" else "SELL",
-            "type": "LIMIT",
-            "quantity": size,
-            "price": price,
-            "timeInForce": "GTC",
-            "timestamp": int(time.time() * 1000)
-        }
+        side = "BUY" if direction.lower() == "buy" else "SELL"
 
-        if order_id:
-            params["clientOrderId"] = order_id
+        # 优先通过WebSocket交易API下单；请求未发出时回退到REST
+        sent, result = self._send_order_ws(side, price, size, order_id)
+        if not sent:
+            endpoint = "/fapi/v1/order"
+            query = self._order_template % (side.encode(), str(size).encode(), str(price).encode(), int(time.time() * 1000))
 
-        params["signature"] = self._generate_signature(params)
+            if order_id:
+                query += b'&' + urlencode({"newClientOrderId": order_id}).encode('utf-8')
 
-        result = self._make_request(endpoint, params, signed=True, method="POST")
+            # signature由_make_request统一添加
+            result = self._make_request(endpoint, query, signed=True, method="POST")
         
         if result is None:
             logger.error("Failed to send order")
@@ -305,6 +590,105 @@ class BinanceGateway:
             logger.error(f"Order failed: {result}")
             return None
 
+    def _ensure_order_ws(self):
+        """建立（或复用）下单用的WebSocket API长连接，返回可用的连接；无法使用时返回None"""
+        if self._order_ws_url is None or websocket is None or any(self.proxies.values()):
+            # 非合约主网、未安装websocket-client或配置了代理时使用REST下单
+            return None
+
+        with self._order_ws_lock:
+            ws = self._order_ws
+            if ws is not None and ws.sock and ws.sock.connected:
+                return ws
+
+            opened = threading.Event()
+            ws = websocket.WebSocketApp(
+                self._order_ws_url,
+                on_open=lambda _ws: opened.set(),
+                on_message=self._on_order_ws_message,
+                on_error=lambda _ws, error: logger.error(f"Order WebSocket error: {error}"),
+                on_close=self._on_order_ws_close,
+            )
+            threading.Thread(target=ws.run_forever, kwargs={'ping_interval': 60}, daemon=True).start()
+            if not opened.wait(self.timeout):
+                ws.close()
+                logger.warning("Order WebSocket connect timeout")
+                return None
+
+            self._order_ws = ws
+            logger.info("Order WebSocket connected")
+            return ws
+
+    def _on_order_ws_message(self, _ws, message):
+        try:
+            data = _json_loads(message)
+        except ValueError as e:
+            logger.error(f"Invalid order WebSocket message: {e}")
+            return
+
+        pending = self._pending.pop(data.get('id'), None)
+        if pending is not None:
+            pending[1].set_result(data)
+
+    def _on_order_ws_close(self, _ws, status_code=None, message=None):
+        # 旧连接的关闭回调可能晚于新连接建立，只处理属于该连接的状态
+        if self._order_ws is _ws:
+            self._order_ws = None
+        # 让经该连接发出、尚未完成的下单请求立即失败
+        for request_id, (ws, _) in list(self._pending.items()):
+            if ws is not _ws:
+                continue
+            pending = self._pending.pop(request_id, None)
+            if pending is not None:
+                pending[1].set_exception(ConnectionError("Order WebSocket closed"))
+        logger.info(f"Order WebSocket closed: {status_code} {message}")
+
+    def _send_order_ws(self, side: str, price: float, size: float, order_id: str = None) -> tuple:
+        """通过WebSocket交易API下单，返回(请求是否已发出, 订单结果)"""
+        ws = self._ensure_order_ws()
+        if ws is None:
+            return False, None
+
+        params = {
+            "apiKey": self.api_key,
+            "price": price,
+            "quantity": size,
+            "side": side,
+            "symbol": self.symbol,
+            "timeInForce": "GTC",
+            "timestamp": int(time.time() * 1000),
+            "type": "LIMIT",
+        }
+        if order_id:
+            params["newClientOrderId"] = order_id
+
+        # WebSocket API要求按参数名排序后签名
+        params = dict(sorted(params.items()))
+        params["signature"] = self._generate_signature(params)
+
+        request_id = uuid.uuid4().hex
+        future = Future()
+        self._pending[request_id] = (ws, future)
+        try:
+            ws.send(_json_dumps({"id": request_id, "method": "order.place", "params": params}).decode('utf-8'))
+        except Exception as e:
+            self._pending.pop(request_id, None)
+            logger.warning(f"Order WebSocket send failed, falling back to REST: {e}")
+            return False, None
+
+        # 请求已发出，不再回退REST，避免重复下单
+        try:
+            response = future.result(timeout=self.timeout)
+        except Exception as e:
+            logger.error(f"Order WebSocket response error: {e}")
+            return True, None
+        finally:
+            self._pending.pop(request_id, None)
+
+        if response.get('status') != 200:
+            return True, response.get('error', response)
+        return True, response.get('result')
+
     def get_account_info(self) -> Optional[Dict[str, Any]]:
         """获取账户信息（账户面板专用）"""
         if not self.connected:
@@ -316,11 +700,9 @@ class BinanceGateway:
             if not time_data:
                 logger.warning("Failed to sync time, continuing with account info retrieval")
 
-            # 根据base_url判断是现货还是合约API
-            if 'fapi' in self.base_url:
+            if self._is_futures:
                 # 合约API
-                endpoint = '/fapi/v2/account'
-                data = self._make_request(endpoint, signed=True)
+                data = self._make_request(self._account_endpoint, signed=True)
                 
                 if data is None:
                     logger.warning("Failed to get futures account info")
@@ -361,7 +743,7 @@ class BinanceGateway:
                     if 'totalUnrealizedProfit' in data:
                         daily_pnl = float(data['totalUnrealizedProfit'])
                     if margin > 0 and equity > 0:
-                        risk_ratio = ((equity / margin) * 100).toFixed(2)
+                        risk_ratio = f"{equity / margin * 100:.2f}"
 
                     # 计算总持仓
                     positions = data.get('positions', [])
@@ -398,8 +780,7 @@ class BinanceGateway:
                 }
             else:
                 # 现货API
-                endpoint = '/api/v3/account'
-                data = self._make_request(endpoint, signed=True)
+                data = self._make_request(self._account_endpoint, signed=True)
                 
                 if data is None:
                     logger.warning("Failed to get spot account info")
@@ -417,50 +798,64 @@ class BinanceGateway:
                 balances = data.get('balances', []) if isinstance(data, dict) else []
                 uid = data.get('uid', '') if isinstance(data, dict) else ''
                 
-                # 计算总余额（以USDT计价）
-                total_balance = 0.0
-                available_balance = 0.0
-                frozen_balance = 0.0
-                asset_values = {}
-
+                # 筛选非零余额
+                assets = []
+                free_list = []
+                locked_list = []
                 for balance_item in balances:
                     if not isinstance(balance_item, dict):
                         continue
-                    
-                    asset = balance_item.get('asset', '')
+
                     free = float(balance_item.get('free', 0))
                     locked = float(balance_item.get('locked', 0))
-                    total = free + locked
-                    
-                    if total > 0:
-                        # 获取资产最新价格
-                        price = self.get_asset_price(asset)
-                        if price:
-                            value = total * price
-                            total_balance += value
-                            available_balance += free * price
-                            frozen_balance += locked * price
-                            asset_values[asset] = {
-                                'amount': total,
-                                'price': price,
-                                'value': value
-                            }
+                    if free + locked > 0:
+                        assets.append(balance_item.get('asset', ''))
+                        free_list.append(free)
+                        locked_list.append(locked)
 
                 # 获取杠杆账户信息
                 margin_info = self.get_margin_account_info()
+                has_margin = bool(margin_info and isinstance(margin_info, dict))
+
+                # 一次请求获取全市场价格表（现货估值与杠杆BTC换算共用）
+                prices = self._get_all_prices() if assets or has_margin else {}
+
+                # 计算总余额（以USDT计价），无价格的资产按0计
+                free_arr = np.array(free_list, dtype=np.float64)
+                locked_arr = np.array(locked_list, dtype=np.float64)
+                price_arr = np.fromiter(
+                    (1.0 if asset == 'USDT' else prices.get(f'{asset}USDT', 0.0) for asset in assets),
+                    dtype=np.float64, count=len(assets)
+                )
+                amount_arr = free_arr + locked_arr
+                value_arr = amount_arr * price_arr
+                total_balance = float(value_arr.sum())
+                available_balance = float(free_arr @ price_arr)
+                frozen_balance = float(locked_arr @ price_arr)
+
+                # 为所有有价格的资产生成估值明细
+                priced = np.flatnonzero(price_arr > 0)
+                asset_values = {
+                    assets[i]: {
+                        'amount': float(amount_arr[i]),
+                        'price': float(price_arr[i]),
+                        'value': float(value_arr[i])
+                    }
+                    for i in priced
+                }
+
                 margin_balance = 0.0
                 margin_available = 0.0
                 risk_ratio = '--'
 
-                if margin_info and isinstance(margin_info, dict):
+                if has_margin:
+                    btc_price = prices.get('BTCUSDT')
                     if 'totalNetAssetOfBtc' in margin_info:
                         # 杠杆账户总资产（BTC计价），转换为USDT
-                        btc_price = self.get_asset_price('BTC')
                         if btc_price:
                             margin_balance = float(margin_info['totalNetAssetOfBtc']) * btc_price
                     if 'availableBalanceOfBtc' in margin_info:
                         # 杠杆账户可用资产（BTC计价），转换为USDT
-                        btc_price = self.get_asset_price('BTC')
                         if btc_price:
                             margin_available = float(margin_info['availableBalanceOfBtc']) * btc_price
                     if 'totalLiabilityOfBtc' in margin_info and 'totalAssetOfBtc' in margin_info:
@@ -468,7 +863,7 @@ class BinanceGateway:
                         total_asset = float(margin_info['totalAssetOfBtc'])
                         total_liability = float(margin_info['totalLiabilityOfBtc'])
                         if total_liability > 0:
-                            risk_ratio = ((total_asset / total_liability) * 100).toFixed(2)
+                            risk_ratio = f"{total_asset / total_liability * 100:.2f}"
 
                 # 计算总持仓
                 total_position = 0.0
@@ -500,30 +895,21 @@ class BinanceGateway:
             logger.error(f"Error getting account info: {e}")
             # 区分鉴权错误和其他错误
             error_message = str(e)
-            if "API-key format invalid" in error_message or "Invalid API-key" in error_message:
+            match = ACCOUNT_ERROR_RE.search(error_message)
+            if match:
+                error, message = ACCOUNT_ERROR_MAP[match.group(0)]
                 return {
-                    "error": "Invalid API Key",
-                    "message": "API Key格式错误，请检查"
-                }
-            elif "Signature for this request is not valid" in error_message:
-                return {
-                    "error": "Invalid Signature",
-                    "message": "API密钥或签名错误，请检查"
-                }
-            elif "Account has insufficient permissions" in error_message or "api-key permissions" in error_message:
-                return {
-                    "error": "Insufficient Permissions",
-                    "message": "API Key缺少账户读取权限，请在Binance后台开启"
-                }
-            else:
-                return {
-                    "error": "Unknown Error",
-                    "message": f"获取账户信息失败: {error_message}"
+                    "error": error,
+                    "message": message
                 }
+            return {
+                "error": "Unknown Error",
+                "message": f"获取账户信息失败: {error_message}"
+            }
 
     def remove_callback(self, callback):
-        if callback in self.callbacks:
-            self.callbacks.remove(callback)
+        with self._callbacks_lock:
+            self.callbacks = tuple(cb for cb in self.callbacks if cb is not callback)
 
     def get_asset_price(self, asset: str) -> Optional[float]:
         """获取资产的最新价格（以USDT计价）"""
@@ -535,14 +921,25 @@ class BinanceGateway:
             if asset == 'USDT':
                 return 1.0
 
-            # 构建交易对符号
+            now = time.monotonic()
+            with self._price_cache_lock:
+                cached = self._price_cache.get(asset)
+            if cached and cached[1] > now:
+                return cached[0]
+
+            # 构建交易对符号（查询串按资产缓存）
             symbol = f'{asset}USDT'
-            params = {'symbol': symbol}
+            query_string = self._qs_price_cache.get(asset)
+            if query_string is None:
+                query_string = self._qs_price_cache[asset] = urlencode({'symbol': symbol})
 
             # 使用现货API获取价格
-            data = self._make_request('/api/v3/ticker/price', params=params)
+            data = self._make_request(f'/api/v3/ticker/price?{query_string}')
             if data and 'price' in data:
-                return float(data['price'])
+                price = float(data['price'])
+                with self._price_cache_lock:
+                    self._price_cache[asset] = (price, now + PRICE_CACHE_TTL)
+                return price
             else:
                 logger.warning(f"Failed to get price for {symbol}")
                 return None
@@ -550,6 +947,23 @@ class BinanceGateway:
             logger.error(f"Error getting asset price: {e}")
             return None
 
+    def _get_all_prices(self) -> Dict[str, float]:
+        """获取全部交易对的最新价格（单次请求，短时缓存）"""
+        prices, expiry = self._all_prices_cache
+        now = time.monotonic()
+        if expiry > now:
+            return prices
+
+        # 不带symbol参数时返回全部交易对价格
+        data = self._make_request('/api/v3/ticker/price')
+        if not isinstance(data, list):
+            logger.warning("Failed to get all ticker prices")
+            return {}
+
+        prices = {item['symbol']: float(item['price']) for item in data}
+        self._all_prices_cache = (prices, now + ALL_PRICES_CACHE_TTL)
+        return prices
+
     def get_margin_account_info(self) -> Optional[Dict[str, Any]]:
         """获取杠杆账户信息"""
         if not self.connected:
@@ -574,4 +988,5 @@ class BinanceGateway:
             "last_price": self.last_price,
             "last_update": self.last_update_time.isoformat() if self.last_update_time else None,
             "running": self.running,
+            "heartbeat_rtt_ms": median(self._rtt) if self._rtt else None,
         }
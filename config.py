@@ -12,6 +12,9 @@ WEBSERVER_CONFIG = {
     "host": "0.0.0.0",
     "port": 8000,
     "debug": True,
+    # 默认使用多线程服务器；MetaTrader5等阻塞式C调用会卡住eventlet的事件循环，
+    # 仅在确认无此类阻塞调用时才可设为"eventlet"（由start.py在启动时完成monkey patch）
+    "async_mode": "threading",
 }
 
 DATA_CONFIG = {
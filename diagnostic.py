@@ -1,15 +1,63 @@
 import requests
+from requests.adapters import HTTPAdapter
+import io
 import json
+import os
+import socket
+import sys
+import threading
 import time
 import hmac
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from urllib.parse import urlencode
 import MetaTrader5 as mt5
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 单次MT5调用超时（秒）
+MT5_CALL_TIMEOUT = 10
+# DNS解析结果缓存有效期（秒）
+DNS_CACHE_TTL = 300
+
+_dns_cache = {}
+_dns_cache_lock = threading.Lock()
+_original_getaddrinfo = socket.getaddrinfo
+
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    """带TTL的getaddrinfo缓存，避免重复探测同一主机时反复DNS查询"""
+    key = (host, port, family, type, proto, flags)
+    now = time.monotonic()
+    with _dns_cache_lock:
+        cached = _dns_cache.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    result = _original_getaddrinfo(host, port, family, type, proto, flags)
+    with _dns_cache_lock:
+        _dns_cache[key] = (result, now + DNS_CACHE_TTL)
+    return result
+
+
+socket.getaddrinfo = _cached_getaddrinfo
+
+
+@lru_cache(maxsize=8)
+def _hmac_template(secret_key):
+    """按密钥缓存已完成密钥预处理的HMAC对象，签名时copy()后只需计算消息部分"""
+    return hmac.new(secret_key.encode('utf-8'), None, hashlib.sha256)
+
+
 class ConnectionDiagnostics:
     def __init__(self):
         self.results = {
@@ -18,194 +66,255 @@ class ConnectionDiagnostics:
             "network": {},
             "summary": []
         }
+        # 所有探测共用连接池，复用同一主机的TCP/TLS连接
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+        # MT5调用一旦超时即视为终端无响应，之后不再发出任何MT5调用
+        self._mt5_hung = False
 
-    def test_network_connection(self):
-        """测试网络连接"""
-        logger.info("=== 网络连接测试 ===")
-        
+    def close(self):
+        self.session.close()
+
+    def _mt5_call(self, func, *args):
+        """在守护线程中执行MT5调用，超过MT5_CALL_TIMEOUT未返回则抛出TimeoutError
+
+        MT5为阻塞式C接口，无法中断；使用守护线程保证卡住的调用不会阻止进程退出
+        """
+        if self._mt5_hung:
+            raise TimeoutError("MT5 unresponsive, call skipped")
+
+        outcome = {}
+
+        def run():
+            try:
+                outcome["result"] = func(*args)
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True, name="mt5-call")
+        thread.start()
+        thread.join(MT5_CALL_TIMEOUT)
+        if thread.is_alive():
+            self._mt5_hung = True
+            raise TimeoutError("timeout")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    def _mt5_shutdown(self):
+        # 仍有调用卡在终端中时不调用shutdown，避免与未返回的调用并发
+        if not self._mt5_hung:
+            mt5.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run_probes(self, probes):
+        """在同一线程池中并发执行探测，按声明顺序写入结果"""
+        with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+            futures = [(bucket, executor.submit(probe, *args)) for bucket, probe, args in probes]
+
+        for bucket, future in futures:
+            outcome = future.result()
+            # 探测返回单个(name, result)，或由同一请求得出的多个结果列表
+            for name, result in (outcome if isinstance(outcome, list) else [outcome]):
+                self.results[bucket][name] = result
+
+    def _network_probes(self):
         test_urls = [
             ("Google DNS", "https://8.8.8.8"),
             ("Binance API", "https://fapi.binance.com"),
             ("Binance Spot", "https://api.binance.com"),
             ("GitHub", "https://github.com")
         ]
-        
-        for name, url in test_urls:
-            try:
-                start_time = time.time()
-                response = requests.get(url, timeout=5)
-                elapsed_time = (time.time() - start_time) * 1000
-                
-                self.results["network"][name] = {
-                    "status": "success",
-                    "response_time_ms": round(elapsed_time, 2),
-                    "status_code": response.status_code
-                }
-                logger.info(f"✓ {name}: {response.status_code} ({elapsed_time:.2f}ms)")
-            except Exception as e:
-                self.results["network"][name] = {
-                    "status": "failed",
-                    "error": str(e)
-                }
-                logger.error(f"✗ {name}: {str(e)}")
+        return [("network", self._probe_url, (name, url)) for name, url in test_urls]
+
+    def _binance_probes(self, api_key, secret_key):
+        base_url = "https://fapi.binance.com"
+        return [
+            ("binance", self._probe_server_time, (base_url,)),
+            ("binance", self._probe_market_data, (base_url,)),
+            ("binance", self._probe_account, (base_url, api_key, secret_key)),
+        ]
+
+    def test_network_connection(self):
+        """测试网络连接"""
+        logger.info("=== 网络连接测试 ===")
+        self._run_probes(self._network_probes())
 
     def test_binance_api(self, api_key, secret_key):
         """测试Binance API连接"""
         logger.info("\n=== Binance API 连接测试 ===")
-        
-        base_url = "https://fapi.binance.com"
-        
-        # 测试1: 服务器时间
+        self._run_probes(self._binance_probes(api_key, secret_key))
+
+    def run_http_probes(self, api_key, secret_key):
+        """网络连接与Binance API的全部HTTP探测合并到同一线程池并发执行"""
+        logger.info("=== 网络连接与Binance API 测试 ===")
+        self._run_probes(self._network_probes() + self._binance_probes(api_key, secret_key))
+
+    def _probe_url(self, name, url):
+        """探测单个URL的连通性，返回(名称, 结果)"""
+        try:
+            start_time = time.time()
+            response = self.session.get(url, timeout=5)
+            elapsed_time = (time.time() - start_time) * 1000
+
+            logger.info(f"✓ {name}: {response.status_code} ({elapsed_time:.2f}ms)")
+            return name, {
+                "status": "success",
+                "response_time_ms": round(elapsed_time, 2),
+                "status_code": response.status_code
+            }
+        except Exception as e:
+            logger.error(f"✗ {name}: {str(e)}")
+            return name, {
+                "status": "failed",
+                "error": str(e)
+            }
+
+    def _probe_server_time(self, base_url):
+        """测试1: 服务器时间"""
         try:
-            response = requests.get(f"{base_url}/fapi/v1/time", timeout=10)
+            response = self.session.get(f"{base_url}/fapi/v1/time", timeout=10)
             if response.status_code == 200:
                 server_time = response.json()
-                local_time = int(time.time() * 1000)
+                local_time = time.time_ns() // 1_000_000
                 time_diff = abs(server_time['serverTime'] - local_time)
                 
-                self.results["binance"]["server_time"] = {
+                logger.info(f"✓ 服务器时间: {server_time['serverTime']} (时间差: {time_diff}ms)")
+                return "server_time", {
                     "status": "success",
                     "server_time": server_time['serverTime'],
                     "local_time": local_time,
                     "time_diff_ms": time_diff,
                     "time_sync": "OK" if time_diff < 1000 else "WARNING"
                 }
-                logger.info(f"✓ 服务器时间: {server_time['serverTime']} (时间差: {time_diff}ms)")
             else:
-                self.results["binance"]["server_time"] = {
+                logger.error(f"✗ 服务器时间请求失败: {response.status_code}")
+                return "server_time", {
                     "status": "failed",
                     "status_code": response.status_code,
                     "error": response.text
                 }
-                logger.error(f"✗ 服务器时间请求失败: {response.status_code}")
         except Exception as e:
-            self.results["binance"]["server_time"] = {
+            logger.error(f"✗ 服务器时间请求异常: {str(e)}")
+            return "server_time", {
                 "status": "failed",
                 "error": str(e)
             }
-            logger.error(f"✗ 服务器时间请求异常: {str(e)}")
 
-        # 测试2: 市场数据
+    def _probe_market_data(self, base_url):
+        """测试2: 市场数据"""
         try:
             symbol = "XAUUSDT"
-            response = requests.get(
+            response = self.session.get(
                 f"{base_url}/fapi/v1/ticker/price",
                 params={"symbol": symbol},
                 timeout=10
             )
             if response.status_code == 200:
                 price_data = response.json()
-                self.results["binance"]["market_data"] = {
+                logger.info(f"✓ 市场数据: {symbol} = {price_data['price']}")
+                return "market_data", {
                     "status": "success",
                     "symbol": symbol,
                     "price": price_data['price'],
                     "timestamp": price_data['time']
                 }
-                logger.info(f"✓ 市场数据: {symbol} = {price_data['price']}")
             else:
-                self.results["binance"]["market_data"] = {
+                logger.error(f"✗ 市场数据请求失败: {response.status_code}")
+                return "market_data", {
                     "status": "failed",
                     "status_code": response.status_code,
                     "error": response.text
                 }
-                logger.error(f"✗ 市场数据请求失败: {response.status_code}")
         except Exception as e:
-            self.results["binance"]["market_data"] = {
+            logger.error(f"✗ 市场数据请求异常: {str(e)}")
+            return "market_data", {
                 "status": "failed",
                 "error": str(e)
             }
-            logger.error(f"✗ 市场数据请求异常: {str(e)}")
 
-        # 测试3: API密钥验证
+    def _probe_account(self, base_url, api_key, secret_key):
+        """测试3/4: 签名请求账户接口，由同一响应判断API密钥与签名是否有效"""
         try:
+            timestamp = time.time_ns() // 1_000_000
+            params = {
+                'timestamp': timestamp,
+                'recvWindow': 5000
+            }
+            
+            query_string = urlencode(params)
+            mac = _hmac_template(secret_key).copy()
+            mac.update(query_string.encode('utf-8'))
+            signature = mac.hexdigest()
+            
+            params['signature'] = signature
+            
             headers = {'X-MBX-APIKEY': api_key}
-            response = requests.get(
+            response = self.session.get(
                 f"{base_url}/fapi/v2/account",
                 headers=headers,
+                params=params,
                 timeout=10
             )
             
             if response.status_code == 200:
                 account_data = response.json()
-                self.results["binance"]["api_key"] = {
-                    "status": "success",
-                    "api_key_valid": True,
-                    "account_type": account_data.get('accountType', 'unknown'),
-                    "total_wallet_balance": account_data.get('totalWalletBalance', 0)
-                }
                 logger.info(f"✓ API密钥有效: 账户类型={account_data.get('accountType', 'unknown')}")
-            elif response.status_code == 401:
-                self.results["binance"]["api_key"] = {
+                logger.info("✓ 签名验证成功")
+                return [
+                    ("api_key", {
+                        "status": "success",
+                        "api_key_valid": True,
+                        "account_type": account_data.get('accountType', 'unknown'),
+                        "total_wallet_balance": account_data.get('totalWalletBalance', 0)
+                    }),
+                    ("signature", {
+                        "status": "success",
+                        "signature_valid": True
+                    }),
+                ]
+
+            if response.status_code == 401:
+                logger.error("✗ API密钥无效或已过期 (401)")
+                api_key_result = {
                     "status": "failed",
                     "error": "API密钥无效或已过期",
                     "status_code": 401
                 }
-                logger.error("✗ API密钥无效或已过期 (401)")
             elif response.status_code == 403:
-                self.results["binance"]["api_key"] = {
+                logger.error("✗ API密钥权限不足 (403)")
+                api_key_result = {
                     "status": "failed",
                     "error": "API密钥权限不足",
                     "status_code": 403
                 }
-                logger.error("✗ API密钥权限不足 (403)")
             else:
-                self.results["binance"]["api_key"] = {
+                logger.error(f"✗ API密钥验证失败: {response.status_code}")
+                api_key_result = {
                     "status": "failed",
                     "status_code": response.status_code,
                     "error": response.text
                 }
-                logger.error(f"✗ API密钥验证失败: {response.status_code}")
-        except Exception as e:
-            self.results["binance"]["api_key"] = {
-                "status": "failed",
-                "error": str(e)
-            }
-            logger.error(f"✗ API密钥验证异常: {str(e)}")
-
-        # 测试4: 签名验证
-        try:
-            timestamp = int(time.time() * 1000)
-            params = {
-                'timestamp': timestamp,
-                'recvWindow': 5000
-            }
-            
-            query_string = '&'.join([f"{key}={value}" for key, value in params.items()])
-            signature = hmac.new(
-                secret_key.encode('utf-8'),
-                query_string.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
-            
-            params['signature'] = signature
-            
-            headers = {'X-MBX-APIKEY': api_key}
-            response = requests.get(
-                f"{base_url}/fapi/v2/account",
-                headers=headers,
-                params=params,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                self.results["binance"]["signature"] = {
-                    "status": "success",
-                    "signature_valid": True
-                }
-                logger.info("✓ 签名验证成功")
-            else:
-                self.results["binance"]["signature"] = {
+            logger.error(f"✗ 签名验证失败: {response.status_code}")
+            return [
+                ("api_key", api_key_result),
+                ("signature", {
                     "status": "failed",
                     "status_code": response.status_code,
                     "error": response.text
-                }
-                logger.error(f"✗ 签名验证失败: {response.status_code}")
+                }),
+            ]
         except Exception as e:
-            self.results["binance"]["signature"] = {
-                "status": "failed",
-                "error": str(e)
-            }
-            logger.error(f"✗ 签名验证异常: {str(e)}")
+            logger.error(f"✗ 账户接口验证异常: {str(e)}")
+            return [
+                ("api_key", {"status": "failed", "error": str(e)}),
+                ("signature", {"status": "failed", "error": str(e)}),
+            ]
 
     def test_bybit_mt5(self, login, password, server):
         """测试Bybit MT5连接"""
@@ -213,7 +322,7 @@ class ConnectionDiagnostics:
         
         # 测试1: MT5初始化
         try:
-            if not mt5.initialize():
+            if not self._mt5_call(mt5.initialize):
                 error = mt5.last_error()
                 self.results["bybit"]["mt5_init"] = {
                     "status": "failed",
@@ -236,14 +345,14 @@ class ConnectionDiagnostics:
 
         # 测试2: MT5登录
         try:
-            if not mt5.login(int(login), password, server):
+            if not self._mt5_call(mt5.login, int(login), password, server):
                 error = mt5.last_error()
                 self.results["bybit"]["mt5_login"] = {
                     "status": "failed",
                     "error": str(error)
                 }
                 logger.error(f"✗ MT5登录失败: {error}")
-                mt5.shutdown()
+                self._mt5_shutdown()
                 return
             else:
                 self.results["bybit"]["mt5_login"] = {
@@ -258,12 +367,12 @@ class ConnectionDiagnostics:
                 "error": str(e)
             }
             logger.error(f"✗ MT5登录异常: {str(e)}")
-            mt5.shutdown()
+            self._mt5_shutdown()
             return
 
         # 测试3: 获取账户信息
         try:
-            account_info = mt5.account_info()
+            account_info = self._mt5_call(mt5.account_info)
             if account_info:
                 self.results["bybit"]["account_info"] = {
                     "status": "success",
@@ -295,7 +404,7 @@ class ConnectionDiagnostics:
         # 测试4: 获取交易品种信息
         try:
             symbol = "XAUUSD.s"
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self._mt5_call(mt5.symbol_info, symbol)
             if symbol_info:
                 self.results["bybit"]["symbol_info"] = {
                     "status": "success",
@@ -325,7 +434,7 @@ class ConnectionDiagnostics:
 
         # 测试5: 获取实时报价
         try:
-            tick = mt5.symbol_info_tick(symbol)
+            tick = self._mt5_call(mt5.symbol_info_tick, symbol)
             if tick:
                 self.results["bybit"]["tick_data"] = {
                     "status": "success",
@@ -350,117 +459,83 @@ class ConnectionDiagnostics:
             }
             logger.error(f"✗ 获取实时报价异常: {str(e)}")
 
-        mt5.shutdown()
+        self._mt5_shutdown()
 
     def generate_summary(self):
         """生成诊断摘要"""
         logger.info("\n=== 诊断摘要 ===")
         
-        # Binance摘要
-        binance_ok = True
-        for test_name, result in self.results["binance"].items():
-            if result.get("status") != "success":
-                binance_ok = False
-                break
-        
-        if binance_ok:
-            self.results["summary"].append("✓ Binance API 连接正常")
-            logger.info("✓ Binance API 连接正常")
-        else:
-            self.results["summary"].append("✗ Binance API 连接存在问题")
-            logger.error("✗ Binance API 连接存在问题")
-
-        # Bybit摘要
-        bybit_ok = True
-        for test_name, result in self.results["bybit"].items():
-            if result.get("status") != "success":
-                bybit_ok = False
-                break
-        
-        if bybit_ok:
-            self.results["summary"].append("✓ Bybit MT5 连接正常")
-            logger.info("✓ Bybit MT5 连接正常")
-        else:
-            self.results["summary"].append("✗ Bybit MT5 连接存在问题")
-            logger.error("✗ Bybit MT5 连接存在问题")
-
-        # 网络摘要
-        network_ok = True
-        for test_name, result in self.results["network"].items():
-            if result.get("status") != "success":
-                network_ok = False
-                break
-        
-        if network_ok:
-            self.results["summary"].append("✓ 网络连接正常")
-            logger.info("✓ 网络连接正常")
-        else:
-            self.results["summary"].append("✗ 网络连接存在问题")
-            logger.error("✗ 网络连接存在问题")
+        for key, label in (("binance", "Binance API 连接"), ("bybit", "Bybit MT5 连接"), ("network", "网络连接")):
+            ok = all(r.get("status") == "success" for r in self.results[key].values())
+            msg = f"✓ {label}正常" if ok else f"✗ {label}存在问题"
+            self.results["summary"].append(msg)
+            (logger.info if ok else logger.error)(msg)
 
     def save_results(self, filename="diagnostic_results.json"):
         """保存诊断结果"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        # CI环境中不缩进，减小输出体积
+        indent = not os.environ.get("CI")
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(self.results, option=option))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(self.results, f, indent=2 if indent else None, ensure_ascii=False)
         logger.info(f"\n诊断结果已保存到: {filename}")
 
     def print_detailed_report(self):
         """打印详细报告"""
-        print("\n" + "="*80)
-        print("详细诊断报告")
-        print("="*80)
-        
-        print("\n【网络连接】")
-        for test_name, result in self.results["network"].items():
-            status_icon = "✓" if result.get("status") == "success" else "✗"
-            print(f"{status_icon} {test_name}: {result}")
-        
-        print("\n【Binance API】")
-        for test_name, result in self.results["binance"].items():
-            status_icon = "✓" if result.get("status") == "success" else "✗"
-            print(f"{status_icon} {test_name}: {result}")
-        
-        print("\n【Bybit MT5】")
-        for test_name, result in self.results["bybit"].items():
-            status_icon = "✓" if result.get("status") == "success" else "✗"
-            print(f"{status_icon} {test_name}: {result}")
-        
-        print("\n【诊断摘要】")
+        # 先拼接到缓冲区再一次性输出，避免逐行print反复加锁与刷新
+        buf = io.StringIO()
+        w = buf.write
+        w("\n" + "="*80 + "\n详细诊断报告\n" + "="*80 + "\n")
+
+        for title, bucket in (("网络连接", "network"), ("Binance API", "binance"), ("Bybit MT5", "bybit")):
+            w(f"\n【{title}】\n")
+            for test_name, result in self.results[bucket].items():
+                status_icon = "✓" if result.get("status") == "success" else "✗"
+                w(f"{status_icon} {test_name}: {result}\n")
+
+        w("\n【诊断摘要】\n")
         for summary in self.results["summary"]:
-            print(summary)
-        
-        print("\n" + "="*80)
+            w(f"{summary}\n")
+
+        w("\n" + "="*80 + "\n")
+        sys.stdout.write(buf.getvalue())
 
 
 def main():
     from config import BINANCE_CONFIG, MT5_GATEWAY_CONFIG
     
-    diagnostics = ConnectionDiagnostics()
-    
-    # 测试网络连接
-    diagnostics.test_network_connection()
-    
-    # 测试Binance API
-    diagnostics.test_binance_api(
-        BINANCE_CONFIG['api_key'],
-        BINANCE_CONFIG['secret_key']
-    )
-    
-    # 测试Bybit MT5
-    diagnostics.test_bybit_mt5(
-        MT5_GATEWAY_CONFIG['login'],
-        MT5_GATEWAY_CONFIG['password'],
-        MT5_GATEWAY_CONFIG['server']
-    )
-    
-    # 生成摘要
-    diagnostics.generate_summary()
-    
-    # 保存结果
-    diagnostics.save_results()
-    
-    # 打印详细报告
-    diagnostics.print_detailed_report()
+    with ConnectionDiagnostics() as diagnostics:
+        # HTTP探测（网络连接与Binance API）与Bybit MT5测试访问的资源互不相关，
+        # 且各自只写入results中不同的分组，可并发执行
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(
+                    diagnostics.run_http_probes,
+                    BINANCE_CONFIG['api_key'],
+                    BINANCE_CONFIG['secret_key']
+                ),
+                executor.submit(
+                    diagnostics.test_bybit_mt5,
+                    MT5_GATEWAY_CONFIG['login'],
+                    MT5_GATEWAY_CONFIG['password'],
+                    MT5_GATEWAY_CONFIG['server']
+                ),
+            ]
+        for future in futures:
+            future.result()
+
+        # 生成摘要
+        diagnostics.generate_summary()
+
+        # 保存结果
+        diagnostics.save_results()
+
+        # 打印详细报告
+        diagnostics.print_detailed_report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+import json
+
+# 测试脚本共用的JSON编解码：优先使用orjson，未安装时回退到标准库json
+try:
+    import orjson
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def load_settings_subtree(prefix, path='arbitrage_settings.json'):
+    """流式解析settings文件，只取prefix（如'strategy_settings.xxx'）对应的子树；不存在时返回None"""
+    with open(path, 'rb') as f:
+        if ijson is not None:
+            return next(ijson.items(f, prefix, use_float=True), None)
+        data = json_loads(f.read())
+    for key in prefix.split('.'):
+        data = data.get(key) if isinstance(data, dict) else None
+    return data
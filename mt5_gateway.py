@@ -1,6 +1,7 @@
 import MetaTrader5 as mt5
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional, Dict, Any
 import logging
@@ -8,6 +9,15 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 报价轮询周期（秒），仅在报价更新时触发回调
+STREAM_POLL_INTERVAL = 0.1
+# 品种信息缓存有效期（秒），品种元数据很少变化
+SYMBOL_INFO_CACHE_TTL = 60
+# 账户信息缓存有效期（秒），用于合并短时间内的重复查询
+ACCOUNT_INFO_CACHE_TTL = 1.0
+# 每次增量拉取的最大报价条数
+TICK_BATCH_SIZE = 1000
+
 
 class MT5Gateway:
     def __init__(self, login: str, password: str, server: str, symbols: list):
@@ -17,10 +27,21 @@ class MT5Gateway:
         self.symbols = symbols
         self.connected = False
         self.last_price = None
-        self.last_update_time = None
-        self.callbacks = []
+        self.last_update_time = None  # 毫秒时间戳
+        # 回调以不可变tuple保存：注册/注销时加锁整体替换，行情线程直接读取快照
+        self.callbacks = ()
+        self._callbacks_lock = threading.Lock()
         self.running = False
         self.thread = None
+        self._stop = threading.Event()
+        self._pool = None
+        # 报价热路径中频繁调用的函数预先绑定，省去每次的模块属性查找
+        self._tick_fn = mt5.symbol_info_tick
+        self._copy_ticks_fn = mt5.copy_ticks_from
+        self._err_fn = mt5.last_error
+        self._last_tick_msc: Dict[str, int] = {}
+        self._sym_info_cache: Dict[str, tuple] = {}  # symbol -> (cached_at, symbol_info)
+        self._account_info_cache = (0.0, None)  # (cached_at, account info dict)
 
     def connect(self) -> bool:
         try:
@@ -49,8 +70,12 @@ class MT5Gateway:
 
     def disconnect(self):
         self.running = False
+        self._stop.set()
         if self.thread:
             self.thread.join(timeout=5)
+        if self._pool:
+            self._pool.shutdown(wait=False)
+            self._pool = None
         if self.connected:
             mt5.shutdown()
             self.connected = False
@@ -60,57 +85,113 @@ class MT5Gateway:
         if not self.connected:
             return None
 
-        tick = mt5.symbol_info_tick(symbol)
+        tick = self._tick_fn(symbol)
+        if tick is None:
+            logger.warning(f"Failed to get tick for {symbol}: {self._err_fn()}")
+            return None
+
+        return self._format_tick(symbol, tick)
+
+    def _poll_tick(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """获取报价，与上次相比没有新报价时返回None"""
+        if not self.connected:
+            return None
+
+        last_msc = self._last_tick_msc.get(symbol)
+        if last_msc is not None:
+            # 一次调用取回上次报价之后的报价（NumPy结构化数组），只推送最新一条
+            ticks = self._copy_ticks_fn(symbol, last_msc // 1000, TICK_BATCH_SIZE, mt5.COPY_TICKS_INFO)
+            if ticks is None:
+                logger.warning(f"Failed to copy ticks for {symbol}: {self._err_fn()}")
+                return None
+            # 每次成功轮询都刷新数据时间，行情清淡无新报价时状态仍视为正常
+            self.last_update_time = time.time_ns() // 1_000_000
+            if len(ticks) < TICK_BATCH_SIZE:
+                if len(ticks) == 0 or ticks['time_msc'][-1] <= last_msc:
+                    return None
+
+                newest = ticks[-1]
+                self._last_tick_msc[symbol] = int(newest['time_msc'])
+                bid = float(newest['bid'])
+                ask = float(newest['ask'])
+                return {
+                    "symbol": symbol,
+                    "bid": bid,
+                    "ask": ask,
+                    "spread": ask - bid,
+                    "time": int(newest['time_msc']),
+                    "volume": int(newest['volume']),
+                }
+            # 积压超过一批（终端卡顿或断线后），批内最新一条仍是旧报价，改取当前报价并推进起点
+
+        # 首次轮询或积压时取当前报价作为增量拉取的起点
+        tick = self._tick_fn(symbol)
         if tick is None:
-            logger.warning(f"Failed to get tick for {symbol}: {mt5.last_error()}")
+            logger.warning(f"Failed to get tick for {symbol}: {self._err_fn()}")
+            return None
+        self.last_update_time = time.time_ns() // 1_000_000
+        if last_msc is not None and tick.time_msc <= last_msc:
             return None
+        self._last_tick_msc[symbol] = tick.time_msc
+        return self._format_tick(symbol, tick)
 
+    def _format_tick(self, symbol: str, tick) -> Dict[str, Any]:
         return {
             "symbol": symbol,
             "bid": tick.bid,
             "ask": tick.ask,
             "spread": tick.ask - tick.bid,
-            "time": datetime.fromtimestamp(tick.time).isoformat(),
+            "time": tick.time_msc,
             "volume": tick.volume,
         }
 
+    @staticmethod
+    def iso(ts_ms: int) -> str:
+        """将毫秒时间戳格式化为ISO字符串，仅在需要输出文本时调用"""
+        return datetime.fromtimestamp(ts_ms / 1000).isoformat()
+
     def start_streaming(self):
         if self.running:
             logger.warning("Streaming already running")
             return
 
         self.running = True
+        self._stop.clear()
+        # 多品种报价并发获取（symbol_info_tick为C扩展调用，执行时释放GIL）
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(len(self.symbols), 16)),
+                                        thread_name_prefix="mt5-tick")
         self.thread = threading.Thread(target=self._stream_loop, daemon=True)
         self.thread.start()
         logger.info("Started price streaming")
 
     def _stream_loop(self):
+        pool = self._pool
         while self.running and self.connected:
-            for symbol in self.symbols:
-                tick = self.get_tick(symbol)
+            for tick in pool.map(self._poll_tick, self.symbols):
                 if tick:
                     self.last_price = tick
-                    self.last_update_time = datetime.now()
-                    for callback in self.callbacks:
+                    callbacks = self.callbacks
+                    for callback in callbacks:
                         try:
                             callback(tick)
                         except Exception as e:
                             logger.error(f"Callback error: {e}")
 
-            time.sleep(1)
+            self._stop.wait(STREAM_POLL_INTERVAL)
 
     def add_callback(self, callback):
-        self.callbacks.append(callback)
+        with self._callbacks_lock:
+            self.callbacks = self.callbacks + (callback,)
 
     def remove_callback(self, callback):
-        if callback in self.callbacks:
-            self.callbacks.remove(callback)
+        with self._callbacks_lock:
+            self.callbacks = tuple(cb for cb in self.callbacks if cb is not callback)
 
     def get_status(self) -> Dict[str, Any]:
         return {
             "connected": self.connected,
             "last_price": self.last_price,
-            "last_update": self.last_update_time.isoformat() if self.last_update_time else None,
+            "last_update": self.last_update_time,
             "running": self.running,
         }
 
@@ -118,12 +199,17 @@ class MT5Gateway:
         if not self.connected:
             return None
 
+        cached_at, cached = self._account_info_cache
+        now = time.monotonic()
+        if cached is not None and now - cached_at < ACCOUNT_INFO_CACHE_TTL:
+            return dict(cached)
+
         account_info = mt5.account_info()
         if account_info is None:
             logger.error(f"Failed to get account info: {mt5.last_error()}")
             return None
 
-        return {
+        info = {
             "login": account_info.login,
             "server": account_info.server,
             "company": account_info.company,
@@ -135,6 +221,20 @@ class MT5Gateway:
             "margin_level": account_info.margin_level,
             "profit": account_info.profit,
         }
+        self._account_info_cache = (now, info)
+        return dict(info)
+
+    def _cached_symbol_info(self, symbol: str):
+        """获取品种信息，SYMBOL_INFO_CACHE_TTL内复用上次结果"""
+        now = time.monotonic()
+        cached = self._sym_info_cache.get(symbol)
+        if cached and now - cached[0] < SYMBOL_INFO_CACHE_TTL:
+            return cached[1]
+
+        symbol_info = mt5.symbol_info(symbol)
+        if symbol_info is not None:
+            self._sym_info_cache[symbol] = (now, symbol_info)
+        return symbol_info
 
     def send_order(self, direction: str, price: float, size: float, order_id: str = None) -> str:
         if not self.connected:
@@ -143,7 +243,7 @@ class MT5Gateway:
 
         symbol = self.symbols[0] if self.symbols else "XAUUSD.s"
         
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = self._cached_symbol_info(symbol)
         if symbol_info is None:
             logger.error(f"Failed to get symbol info for {symbol}")
             return None
@@ -172,6 +272,10 @@ class MT5Gateway:
 
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             logger.error(f"Order failed: {result.retcode} - {result.comment}")
+            if result.retcode in (mt5.TRADE_RETCODE_INVALID, mt5.TRADE_RETCODE_INVALID_VOLUME,
+                                  mt5.TRADE_RETCODE_INVALID_PRICE):
+                # 参数类错误可能源于品种规格变化，丢弃缓存以便下次重新获取
+                self._sym_info_cache.pop(symbol, None)
             return None
 
         logger.info(f"Order sent successfully: {result.order}")
@@ -1,85 +1,205 @@
 import threading
-from datetime import datetime, timedelta
+import time
+from collections import deque
+from itertools import count
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Dict, List, Optional, Any
 import logging
 
+import numpy as np
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 风控摘要缓存有效期（秒），仪表盘轮询期间无变化时直接返回缓存
+SUMMARY_CACHE_TTL = 0.5
+RECENT_EVENT_WINDOW_NS = 24 * 3600 * 1_000_000_000
+
+# 内部时间戳使用单调时钟纳秒整数，仅在输出时借助这对基准换算为墙钟时间
+_EPOCH_WALL = time.time()
+_EPOCH_MONO_NS = time.monotonic_ns()
+
+
+def _mono_ns_to_datetime(ns: int) -> datetime:
+    return datetime.fromtimestamp(_EPOCH_WALL + (ns - _EPOCH_MONO_NS) / 1e9)
+
+
+class RWLock:
+    """读写锁：读者可并发持有，写者独占；有写者等待时新读者让行，避免写饥饿"""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def gen_rlock(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def gen_wlock(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+@dataclass
+class RiskEvent:
+    __slots__ = ('timestamp_ns', 'account_id', 'rule', 'message')
+
+    timestamp_ns: int
+    account_id: str
+    rule: str
+    message: str
+
 
 class RiskRule:
+    __slots__ = ('name', 'enabled', 'violations', 'last_violation_ns', '_lock', '__weakref__')
+
     def __init__(self, name: str, enabled: bool = True):
         self.name = name
         self.enabled = enabled
         self.violations = 0
-        self.last_violation_time = None
+        self.last_violation_ns = 0
+        # 检查在规则快照上无锁并发执行，规则自身状态的更新由规则级锁保护
+        self._lock = threading.Lock()
 
     def check(self, **kwargs) -> tuple[bool, str]:
         raise NotImplementedError
 
     def record_violation(self, message: str):
-        self.violations += 1
-        self.last_violation_time = datetime.now()
-        logger.warning(f"Risk rule violation: {self.name} - {message}")
+        with self._lock:
+            self.violations += 1
+            self.last_violation_ns = time.monotonic_ns()
+        logger.warning("Risk rule violation: %s - %s", self.name, message)
+
+    @property
+    def last_violation_time(self) -> Optional[datetime]:
+        return _mono_ns_to_datetime(self.last_violation_ns) if self.last_violation_ns else None
 
 
 class MaxPositionRiskRule(RiskRule):
+    __slots__ = ('_max_position', '_limit')
+
     def __init__(self, max_position: float):
         super().__init__("Max Position Risk")
         self.max_position = max_position
 
+    @property
+    def max_position(self) -> float:
+        return self._max_position
+
+    @max_position.setter
+    def max_position(self, value: float):
+        # 检查时比较的浮点上限随公开属性同步更新
+        self._max_position = value
+        self._limit = float(value)
+
     def check(self, current_position: float, **kwargs) -> tuple[bool, str]:
         if not self.enabled:
             return True, ""
 
-        if abs(current_position) >= self.max_position:
-            return False, f"Position {current_position} exceeds max {self.max_position}"
-        return True, ""
+        if -self._limit < current_position < self._limit:
+            return True, ""
+        return False, f"Position {current_position} exceeds max {self.max_position}"
 
 
 class MaxOrderSizeRiskRule(RiskRule):
+    __slots__ = ('_max_order_size', '_limit')
+
     def __init__(self, max_order_size: float):
         super().__init__("Max Order Size Risk")
         self.max_order_size = max_order_size
 
+    @property
+    def max_order_size(self) -> float:
+        return self._max_order_size
+
+    @max_order_size.setter
+    def max_order_size(self, value: float):
+        # 检查时比较的浮点上限随公开属性同步更新
+        self._max_order_size = value
+        self._limit = float(value)
+
     def check(self, order_size: float, **kwargs) -> tuple[bool, str]:
         if not self.enabled:
             return True, ""
 
-        if abs(order_size) > self.max_order_size:
-            return False, f"Order size {order_size} exceeds max {self.max_order_size}"
-        return True, ""
+        if -self._limit <= order_size <= self._limit:
+            return True, ""
+        return False, f"Order size {order_size} exceeds max {self.max_order_size}"
 
 
 class DailyLossRiskRule(RiskRule):
+    __slots__ = ('max_daily_loss', 'daily_pnl', 'reset_ordinal')
+
     def __init__(self, max_daily_loss: float):
         super().__init__("Daily Loss Risk")
         self.max_daily_loss = max_daily_loss
         self.daily_pnl = 0.0
-        self.reset_date = datetime.now().date()
+        self.reset_ordinal = datetime.now().toordinal()
 
-    def check(self, trade_pnl: float = 0.0, **kwargs) -> tuple[bool, str]:
+    def check(self, trade_pnl: float = 0.0, now: Optional[datetime] = None, **kwargs) -> tuple[bool, str]:
         if not self.enabled:
             return True, ""
 
-        today = datetime.now().date()
-        if today != self.reset_date:
-            self.daily_pnl = 0.0
-            self.reset_date = today
-            logger.info("Daily loss counter reset")
+        today = (now or datetime.now()).toordinal()
+        with self._lock:
+            if today != self.reset_ordinal:
+                self.daily_pnl = 0.0
+                self.reset_ordinal = today
+                logger.info("Daily loss counter reset")
 
-        self.daily_pnl += trade_pnl
+            self.daily_pnl += trade_pnl
+            daily_pnl = self.daily_pnl
 
-        if self.daily_pnl < -self.max_daily_loss:
-            return False, f"Daily loss {self.daily_pnl} exceeds max {self.max_daily_loss}"
+        if daily_pnl < -self.max_daily_loss:
+            return False, f"Daily loss {daily_pnl} exceeds max {self.max_daily_loss}"
         return True, ""
 
     def reset(self):
-        self.daily_pnl = 0.0
-        self.reset_date = datetime.now().date()
+        with self._lock:
+            self.daily_pnl = 0.0
+            self.reset_ordinal = datetime.now().toordinal()
 
 
 class MaxChaseOrderRiskRule(RiskRule):
+    __slots__ = ('max_chase_count',)
+
     def __init__(self, max_chase_count: int):
         super().__init__("Max Chase Order Risk")
         self.max_chase_count = max_chase_count
@@ -96,148 +216,332 @@ class MaxChaseOrderRiskRule(RiskRule):
 class RiskManager:
     def __init__(self):
         self.rules: List[RiskRule] = []
-        self.lock = threading.Lock()
+        # 按检查入口预先分组的规则，增删规则时重建，检查时只遍历相关规则
+        self._order_rules = ()
+        self._trade_rules = ()
+        self._chase_rules = ()
+        # 带reset()的规则单独登记，每日重置时无需遍历全部规则
+        self._resettable_rules: List[RiskRule] = []
+        # 风控检查与摘要只读规则列表，取读锁并发执行；增删规则取写锁
+        self.lock = RWLock()
         self.enabled = True
-        self.risk_events: List[Dict[str, Any]] = []
+        # 风险事件单独加锁，记录事件无需持有写锁
+        self._events_lock = threading.Lock()
         self.max_event_history = 100
+        # 定长环形缓冲，超出容量时自动淘汰最早的事件
+        self.risk_events = deque(maxlen=self.max_event_history)
+        # 预分配的事件记录：被环形缓冲淘汰的记录回收后复用，违规频发时不再逐条分配对象
+        self._event_pool = deque(RiskEvent(0, "", "", "") for _ in range(self.max_event_history))
+        # 规则、违规与事件的任何变化都会推进版本号，摘要缓存在版本不变且未过期时直接复用
+        self._versions = count(1)
+        self._version = 0
+        self._summary_cache = None
+        self._summary_cache_version = -1
+        self._summary_cache_expiry = 0.0
 
     def add_rule(self, rule: RiskRule):
-        with self.lock:
+        with self.lock.gen_wlock():
             self.rules.append(rule)
-            logger.info(f"Added risk rule: {rule.name}")
+            self._rebuild_rule_buckets()
+            self._version = next(self._versions)
+            logger.info("Added risk rule: %s", rule.name)
 
     def remove_rule(self, rule_name: str):
-        with self.lock:
+        with self.lock.gen_wlock():
             self.rules = [r for r in self.rules if r.name != rule_name]
-            logger.info(f"Removed risk rule: {rule_name}")
+            self._rebuild_rule_buckets()
+            self._version = next(self._versions)
+            logger.info("Removed risk rule: %s", rule_name)
+
+    def enable_rule(self, rule_name: str):
+        """按名称启用规则并推进版本号使风控摘要缓存失效；启停规则应通过本方法与disable_rule"""
+        self._set_rule_enabled(rule_name, True)
+
+    def disable_rule(self, rule_name: str):
+        """按名称停用规则并使风控摘要缓存失效（直接修改rule.enabled只影响检查，摘要在缓存过期前仍显示旧状态）"""
+        self._set_rule_enabled(rule_name, False)
+
+    def _set_rule_enabled(self, rule_name: str, enabled: bool):
+        with self.lock.gen_wlock():
+            for rule in self.rules:
+                if rule.name == rule_name:
+                    rule.enabled = enabled
+            self._version = next(self._versions)
+            logger.info("Risk rule %s %s", rule_name, "enabled" if enabled else "disabled")
+
+    def _rebuild_rule_buckets(self):
+        """按规则类型分组并登记可重置规则（调用方持有写锁）
+
+        当日亏损超限后下单与追单同样被拦截，因此DailyLossRiskRule与未知类型的自定义规则对所有检查入口生效；
+        已停用的规则仍保留在分组中，由各规则check()自行判断enabled，直接修改rule.enabled也能立即生效
+        """
+        order_rules, trade_rules, chase_rules = [], [], []
+        for rule in self.rules:
+            if isinstance(rule, (MaxPositionRiskRule, MaxOrderSizeRiskRule)):
+                order_rules.append(rule)
+            elif isinstance(rule, MaxChaseOrderRiskRule):
+                trade_rules.append(rule)
+                chase_rules.append(rule)
+            else:
+                order_rules.append(rule)
+                trade_rules.append(rule)
+                chase_rules.append(rule)
+        self._resettable_rules = [rule for rule in self.rules if hasattr(rule, 'reset')]
+        self._order_rules = tuple(order_rules)
+        self._trade_rules = tuple(trade_rules)
+        self._chase_rules = tuple(chase_rules)
 
     def check_order(self, account_id: str, order_size: float, current_position: float = 0.0) -> tuple[bool, str]:
         if not self.enabled:
             return True, ""
 
-        with self.lock:
-            for rule in self.rules:
-                try:
-                    passed, message = rule.check(
-                        order_size=order_size,
-                        current_position=current_position,
-                        account_id=account_id
-                    )
-                    if not passed:
-                        self._record_risk_event(account_id, rule.name, message)
-                        rule.record_violation(message)
-                        return False, message
-                except Exception as e:
-                    logger.error(f"Error checking rule {rule.name}: {e}")
+        # 持锁仅取规则快照，规则检查与事件记录均在锁外执行
+        with self.lock.gen_rlock():
+            rules = self._order_rules
+
+        for rule in rules:
+            try:
+                passed, message = rule.check(
+                    order_size=order_size,
+                    current_position=current_position,
+                    account_id=account_id
+                )
+                if not passed:
+                    self._record_risk_event(account_id, rule.name, message)
+                    rule.record_violation(message)
+                    self._version = next(self._versions)
+                    return False, message
+            except Exception as e:
+                logger.error("Error checking rule %s: %s", rule.name, e)
 
-            return True, ""
+        return True, ""
+
+    def check_orders_batch(self, account_id: str, sizes, positions) -> tuple[np.ndarray, List[str]]:
+        """批量检查候选订单，返回(每笔是否通过的布尔数组, 每笔的拦截原因)
+
+        内置的仓位/单笔数量规则以NumPy向量化比较，其余规则逐笔调用check()；每笔订单的结果与逐笔调用check_order一致
+        """
+        orig_sizes, orig_positions = sizes, positions
+        sizes = np.asarray(sizes, dtype=float)
+        positions = np.broadcast_to(np.asarray(positions, dtype=float), sizes.shape)
+        n = len(sizes)
+        if not self.enabled or n == 0:
+            return np.ones(n, dtype=bool), [""] * n
+
+        with self.lock.gen_rlock():
+            rules = self._order_rules
+
+        # 调用规则check()时传入调用方的原始元素，提示信息与逐笔check_order一致；仅在需要时构建
+        raw_sizes = raw_positions = None
+        violations = np.zeros((n, len(rules)), dtype=bool)
+        callback_messages = {}
+        for j, rule in enumerate(rules):
+            if isinstance(rule, (MaxPositionRiskRule, MaxOrderSizeRiskRule)) and not rule.enabled:
+                continue
+            if isinstance(rule, MaxPositionRiskRule):
+                violations[:, j] = np.abs(positions) >= rule._limit
+            elif isinstance(rule, MaxOrderSizeRiskRule):
+                violations[:, j] = np.abs(sizes) > rule._limit
+            else:
+                if raw_sizes is None:
+                    raw_sizes, raw_positions = self._original_order_values(orig_sizes, orig_positions)
+                for i in range(n):
+                    try:
+                        passed, message = rule.check(
+                            order_size=raw_sizes[i],
+                            current_position=raw_positions[i],
+                            account_id=account_id
+                        )
+                        if not passed:
+                            violations[i, j] = True
+                            callback_messages[i, j] = message
+                    except Exception as e:
+                        logger.error("Error checking rule %s: %s", rule.name, e)
+
+        failed = violations.any(axis=1)
+        first_violation = violations.argmax(axis=1)
+        messages = [""] * n
+        if raw_sizes is None and failed.any():
+            raw_sizes, raw_positions = self._original_order_values(orig_sizes, orig_positions)
+        for i in np.flatnonzero(failed):
+            j = first_violation[i]
+            rule = rules[j]
+            message = callback_messages.get((i, j))
+            if message is None:
+                # 向量化规则只在被拦截的订单上生成与check()相同的提示信息
+                _, message = rule.check(order_size=raw_sizes[i], current_position=raw_positions[i])
+            messages[i] = message
+            self._record_risk_event(account_id, rule.name, message)
+            rule.record_violation(message)
+        if failed.any():
+            self._version = next(self._versions)
+
+        return ~failed, messages
+
+    @staticmethod
+    def _original_order_values(sizes, positions) -> tuple[np.ndarray, np.ndarray]:
+        """以object数组保留调用方传入的原始元素（int仍为int），positions按sizes广播"""
+        raw_sizes = np.asarray(sizes, dtype=object)
+        return raw_sizes, np.broadcast_to(np.asarray(positions, dtype=object), raw_sizes.shape)
 
     def check_trade(self, account_id: str, trade_pnl: float, chase_count: int = 0) -> tuple[bool, str]:
         if not self.enabled:
             return True, ""
 
-        with self.lock:
-            for rule in self.rules:
-                try:
-                    passed, message = rule.check(
-                        trade_pnl=trade_pnl,
-                        chase_count=chase_count,
-                        account_id=account_id
-                    )
-                    if not passed:
-                        self._record_risk_event(account_id, rule.name, message)
-                        rule.record_violation(message)
-                        return False, message
-                except Exception as e:
-                    logger.error(f"Error checking rule {rule.name}: {e}")
+        with self.lock.gen_rlock():
+            rules = self._trade_rules
+
+        # 当前时间每次检查只取一次，供各规则共用
+        now = datetime.now()
+        for rule in rules:
+            try:
+                passed, message = rule.check(
+                    trade_pnl=trade_pnl,
+                    chase_count=chase_count,
+                    account_id=account_id,
+                    now=now
+                )
+                if not passed:
+                    self._record_risk_event(account_id, rule.name, message)
+                    rule.record_violation(message)
+                    self._version = next(self._versions)
+                    return False, message
+            except Exception as e:
+                logger.error("Error checking rule %s: %s", rule.name, e)
 
-            return True, ""
+        return True, ""
 
     def check_chase_order(self, account_id: str, chase_count: int) -> tuple[bool, str]:
         if not self.enabled:
             return True, ""
 
-        with self.lock:
-            for rule in self.rules:
-                try:
-                    passed, message = rule.check(chase_count=chase_count)
-                    if not passed:
-                        self._record_risk_event(account_id, rule.name, message)
-                        rule.record_violation(message)
-                        return False, message
-                except Exception as e:
-                    logger.error(f"Error checking rule {rule.name}: {e}")
+        with self.lock.gen_rlock():
+            rules = self._chase_rules
 
-            return True, ""
+        for rule in rules:
+            try:
+                passed, message = rule.check(chase_count=chase_count)
+                if not passed:
+                    self._record_risk_event(account_id, rule.name, message)
+                    rule.record_violation(message)
+                    self._version = next(self._versions)
+                    return False, message
+            except Exception as e:
+                logger.error("Error checking rule %s: %s", rule.name, e)
+
+        return True, ""
 
     def enable(self):
         self.enabled = True
+        self._version = next(self._versions)
         logger.info("Risk manager enabled")
 
     def disable(self):
         self.enabled = False
+        self._version = next(self._versions)
         logger.warning("Risk manager disabled")
 
     def reset_daily_counters(self):
-        with self.lock:
-            for rule in self.rules:
-                if isinstance(rule, DailyLossRiskRule):
-                    rule.reset()
+        with self.lock.gen_wlock():
+            for rule in self._resettable_rules:
+                rule.reset()
             logger.info("Daily risk counters reset")
 
     def get_risk_summary(self) -> Dict[str, Any]:
-        with self.lock:
-            total_violations = sum(rule.violations for rule in self.rules)
-            active_rules = [rule.name for rule in self.rules if rule.enabled]
+        now = time.monotonic()
+        version = self._version
+        if (self._summary_cache is not None and self._summary_cache_version == version
+                and now < self._summary_cache_expiry):
+            return self._summary_cache
+
+        summary = self._build_risk_summary()
+        self._summary_cache = summary
+        self._summary_cache_version = version
+        self._summary_cache_expiry = now + SUMMARY_CACHE_TTL
+        return summary
+
+    def _build_risk_summary(self) -> Dict[str, Any]:
+        with self.lock.gen_rlock():
+            # 单次遍历同时统计违规总数、启用规则与规则明细
+            total_violations = 0
+            active_rules = []
+            rule_details = []
+            for rule in self.rules:
+                violations = rule.violations
+                last_violation_ns = rule.last_violation_ns
+                total_violations += violations
+                if rule.enabled:
+                    active_rules.append(rule.name)
+                rule_details.append({
+                    "name": rule.name,
+                    "enabled": rule.enabled,
+                    "violations": violations,
+                    "last_violation": _mono_ns_to_datetime(last_violation_ns).isoformat() if last_violation_ns else None
+                })
             
-            recent_events = [
-                event for event in self.risk_events
-                if datetime.now() - event['timestamp'] < timedelta(hours=24)
-            ]
+            cutoff_ns = time.monotonic_ns() - RECENT_EVENT_WINDOW_NS
+            with self._events_lock:
+                recent_events = [event for event in self.risk_events if event.timestamp_ns > cutoff_ns][-10:]
+                # 事件记录会被回收复用，摘要中输出副本，并在此换算为墙钟时间
+                recent_events = [
+                    {
+                        "timestamp": _mono_ns_to_datetime(event.timestamp_ns),
+                        "account_id": event.account_id,
+                        "rule": event.rule,
+                        "message": event.message
+                    }
+                    for event in recent_events
+                ]
 
             return {
                 "enabled": self.enabled,
                 "total_violations": total_violations,
                 "active_rules": active_rules,
-                "recent_events": recent_events[-10:],
-                "rule_details": [
-                    {
-                        "name": rule.name,
-                        "enabled": rule.enabled,
-                        "violations": rule.violations,
-                        "last_violation": rule.last_violation_time.isoformat() if rule.last_violation_time else None
-                    }
-                    for rule in self.rules
-                ]
+                "recent_events": recent_events,
+                "rule_details": rule_details
             }
 
     def _record_risk_event(self, account_id: str, rule_name: str, message: str):
-        event = {
-            "timestamp": datetime.now(),
-            "account_id": account_id,
-            "rule": rule_name,
-            "message": message
-        }
-        self.risk_events.append(event)
-
-        if len(self.risk_events) > self.max_event_history:
-            self.risk_events = self.risk_events[-self.max_event_history:]
-
-        logger.warning(f"Risk event recorded: {event}")
+        timestamp_ns = time.monotonic_ns()
+        with self._events_lock:
+            events = self.risk_events
+            if len(events) == events.maxlen:
+                # 即将被淘汰的最早记录放回对象池
+                self._event_pool.append(events[0])
+            if self._event_pool:
+                event = self._event_pool.pop()
+                event.timestamp_ns = timestamp_ns
+                event.account_id = account_id
+                event.rule = rule_name
+                event.message = message
+            else:
+                event = RiskEvent(timestamp_ns, account_id, rule_name, message)
+            events.append(event)
+        self._version = next(self._versions)
+
+        logger.warning("Risk event recorded: %s", event)
 
     def configure_default_rules(self, config: Dict[str, Any]):
-        self.rules.clear()
+        rules = []
 
         if config.get('max_position'):
-            self.add_rule(MaxPositionRiskRule(config['max_position']))
+            rules.append(MaxPositionRiskRule(config['max_position']))
 
         if config.get('max_order_size'):
-            self.add_rule(MaxOrderSizeRiskRule(config['max_order_size']))
+            rules.append(MaxOrderSizeRiskRule(config['max_order_size']))
 
         if config.get('max_daily_loss'):
-            self.add_rule(DailyLossRiskRule(config['max_daily_loss']))
+            rules.append(DailyLossRiskRule(config['max_daily_loss']))
 
         if config.get('max_chase_count'):
-            self.add_rule(MaxChaseOrderRiskRule(config['max_chase_count']))
+            rules.append(MaxChaseOrderRiskRule(config['max_chase_count']))
+
+        # 整体替换规则列表，检查线程不会看到清空后尚未添加完的中间状态
+        with self.lock.gen_wlock():
+            self.rules = rules
+            self._rebuild_rule_buckets()
+            self._version = next(self._versions)
+        for rule in rules:
+            logger.info("Added risk rule: %s", rule.name)
 
-        logger.info(f"Configured {len(self.rules)} default risk rules")
\ No newline at end of file
+        logger.info("Configured %d default risk rules", len(self.rules))
@@ -2,6 +2,13 @@
 import sys
 import os
 
+from config import WEBSERVER_CONFIG as _webserver_config
+
+# eventlet需在导入其余模块之前完成monkey patch
+if _webserver_config.get('async_mode') == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
 # 添加当前目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -1,13 +1,16 @@
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 def test_binance_connection():
     print("测试 Binance API 连接...")
+    # 复用同一会话，后续对 fapi.binance.com 的请求沿用已建立的TLS连接
+    sess = requests.Session()
     
     # 测试基础连接
     print("\n1. 测试基础连接到 fapi.binance.com...")
     try:
-        response = requests.get('https://fapi.binance.com/fapi/v1/time', timeout=30)
+        response = sess.get('https://fapi.binance.com/fapi/v1/time', timeout=30)
         print(f"✓ 连接成功！状态码: {response.status_code}")
         print(f"  响应时间: {response.elapsed.total_seconds():.2f}秒")
         print(f"  服务器时间: {response.json()}")
@@ -29,7 +32,7 @@ def test_binance_connection():
     
     try:
         headers = {'X-MBX-APIKEY': api_key}
-        response = requests.get(f'{base_url}/fapi/v1/account', headers=headers, timeout=30)
+        response = sess.get(f'{base_url}/fapi/v1/account', headers=headers, timeout=30)
         if response.status_code == 200:
             print("✓ API密钥有效")
             account_info = response.json()
@@ -55,14 +58,21 @@ def test_binance_connection():
         'https://fapi.binance.com'
     ]
     
-    for url in test_urls:
-        try:
-            start_time = time.time()
-            response = requests.get(url, timeout=10)
-            elapsed = time.time() - start_time
-            print(f"✓ {url} - {response.status_code} - {elapsed:.2f}秒")
-        except Exception as e:
-            print(f"✗ {url} - 错误: {str(e)[:50]}")
+    def probe(url):
+        start_time = time.time()
+        response = sess.get(url, timeout=10)
+        return response.status_code, time.time() - start_time
+
+    # 各地址互不相关，并发探测，总耗时取决于最慢的一个
+    with ThreadPoolExecutor(max_workers=len(test_urls)) as executor:
+        futures = {executor.submit(probe, url): url for url in test_urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                status_code, elapsed = future.result()
+                print(f"✓ {url} - {status_code} - {elapsed:.2f}秒")
+            except Exception as e:
+                print(f"✗ {url} - 错误: {str(e)[:50]}")
 
 if __name__ == '__main__':
     test_binance_connection()
@@ -1,9 +1,12 @@
+import io
 import requests
-import json
+from json_utils import json_dumps, json_loads
+from concurrent.futures import ThreadPoolExecutor
 
 # 测试场景1：使用不存在的账户ID
-def test_nonexistent_account():
-    print('=== 测试场景1：使用不存在的账户ID ===')
+def scenario_nonexistent_account(session):
+    out = io.StringIO()
+    print('=== 测试场景1：使用不存在的账户ID ===', file=out)
     test_data = {
         "account_id": "non_existent_account",
         "direction": "buy",
@@ -12,18 +15,20 @@ def test_nonexistent_account():
     }
     
     try:
-        response = requests.post('http://localhost:8000/api/arbitrage/manual-trade', 
+        response = session.post('http://localhost:8000/api/arbitrage/manual-trade', 
                              headers={'Content-Type': 'application/json'},
-                             data=json.dumps(test_data))
-        print('状态码:', response.status_code)
-        print('响应:', response.json())
+                             data=json_dumps(test_data))
+        print('状态码:', response.status_code, file=out)
+        print('响应:', json_loads(response.content), file=out)
     except Exception as e:
-        print('错误:', e)
-    print()
+        print('错误:', e, file=out)
+    print(file=out)
+    return out.getvalue()
 
 # 测试场景2：使用Binance账户（当前未连接）
-def test_binance_disconnected():
-    print('=== 测试场景2：使用Binance账户（当前未连接）===')
+def scenario_binance_disconnected(session):
+    out = io.StringIO()
+    print('=== 测试场景2：使用Binance账户（当前未连接）===', file=out)
     test_data = {
         "account_id": "binance_real",
         "direction": "buy",
@@ -32,18 +37,20 @@ def test_binance_disconnected():
     }
     
     try:
-        response = requests.post('http://localhost:8000/api/arbitrage/manual-trade', 
+        response = session.post('http://localhost:8000/api/arbitrage/manual-trade', 
                              headers={'Content-Type': 'application/json'},
-                             data=json.dumps(test_data))
-        print('状态码:', response.status_code)
-        print('响应:', response.json())
+                             data=json_dumps(test_data))
+        print('状态码:', response.status_code, file=out)
+        print('响应:', json_loads(response.content), file=out)
     except Exception as e:
-        print('错误:', e)
-    print()
+        print('错误:', e, file=out)
+    print(file=out)
+    return out.getvalue()
 
 # 测试场景3：使用Bybit账户（当前未连接）
-def test_bybit_disconnected():
-    print('=== 测试场景3：使用Bybit账户（当前未连接）===')
+def scenario_bybit_disconnected(session):
+    out = io.StringIO()
+    print('=== 测试场景3：使用Bybit账户（当前未连接）===', file=out)
     test_data = {
         "account_id": "bybit_real",
         "direction": "buy",
@@ -52,18 +59,20 @@ def test_bybit_disconnected():
     }
     
     try:
-        response = requests.post('http://localhost:8000/api/arbitrage/manual-trade', 
+        response = session.post('http://localhost:8000/api/arbitrage/manual-trade', 
                              headers={'Content-Type': 'application/json'},
-                             data=json.dumps(test_data))
-        print('状态码:', response.status_code)
-        print('响应:', response.json())
+                             data=json_dumps(test_data))
+        print('状态码:', response.status_code, file=out)
+        print('响应:', json_loads(response.content), file=out)
     except Exception as e:
-        print('错误:', e)
-    print()
+        print('错误:', e, file=out)
+    print(file=out)
+    return out.getvalue()
 
 # 测试场景4：缺少必填参数
-def test_missing_params():
-    print('=== 测试场景4：缺少必填参数 ===')
+def scenario_missing_params(session):
+    out = io.StringIO()
+    print('=== 测试场景4：缺少必填参数 ===', file=out)
     test_data = {
         "account_id": "binance_real",
         "direction": "buy",
@@ -72,20 +81,28 @@ def test_missing_params():
     }
     
     try:
-        response = requests.post('http://localhost:8000/api/arbitrage/manual-trade', 
+        response = session.post('http://localhost:8000/api/arbitrage/manual-trade', 
                              headers={'Content-Type': 'application/json'},
-                             data=json.dumps(test_data))
-        print('状态码:', response.status_code)
-        print('响应:', response.json())
+                             data=json_dumps(test_data))
+        print('状态码:', response.status_code, file=out)
+        print('响应:', json_loads(response.content), file=out)
     except Exception as e:
-        print('错误:', e)
-    print()
+        print('错误:', e, file=out)
+    print(file=out)
+    return out.getvalue()
 
 # 运行所有测试
 if __name__ == '__main__':
     print('开始测试手动交易功能...\n')
-    test_nonexistent_account()
-    test_binance_disconnected()
-    test_bybit_disconnected()
-    test_missing_params()
+    scenarios = [
+        scenario_nonexistent_account,
+        scenario_binance_disconnected,
+        scenario_bybit_disconnected,
+        scenario_missing_params,
+    ]
+    # 各场景互不依赖，共用同一会话并发请求，按场景顺序输出结果
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=len(scenarios)) as executor:
+        futures = [executor.submit(scenario, session) for scenario in scenarios]
+        for future in futures:
+            print(future.result(), end='')
     print('测试完成！')
@@ -1,5 +1,5 @@
 import requests
-import json
+from json_utils import json_dumps, json_loads, load_settings_subtree
 
 # 测试数据
 strategy_data = {
@@ -31,26 +31,25 @@ strategy_data = {
 try:
     response = requests.post('http://localhost:8000/api/strategy/save-grid', 
                          headers={'Content-Type': 'application/json'},
-                         data=json.dumps(strategy_data))
+                         data=json_dumps(strategy_data))
     print('保存请求状态码:', response.status_code)
-    print('保存请求响应:', response.json())
+    print('保存请求响应:', json_loads(response.content))
     
     # 发送获取请求，验证数据是否保存成功
     get_response = requests.get('http://localhost:8000/api/strategy/settings?strategy_type=reverse_arbitrage_bybit')
     print('\n获取请求状态码:', get_response.status_code)
-    print('获取请求响应:', get_response.json())
+    print('获取请求响应:', json_loads(get_response.content))
     
     # 检查本地文件
-    with open('arbitrage_settings.json', 'r', encoding='utf-8') as f:
-        settings_data = json.load(f)
-        print('\n文件中strategy_settings:', settings_data.get('strategy_settings', {}))
-        print('反向套利策略数据:', settings_data.get('strategy_settings', {}).get('reverse_arbitrage_bybit', {}))
-        
-        if 'reverse_arbitrage_bybit' in settings_data.get('strategy_settings', {}):
-            strategy = settings_data['strategy_settings']['reverse_arbitrage_bybit'].get('strategy', [])
-            print('策略阶梯数量:', len(strategy))
-            for i, layer in enumerate(strategy):
-                print(f'阶梯 {i+1}:', layer)
-                
+    strategy_settings = load_settings_subtree('strategy_settings') or {}
+    print('\n文件中strategy_settings:', strategy_settings)
+    print('反向套利策略数据:', strategy_settings.get('reverse_arbitrage_bybit', {}))
+    
+    if 'reverse_arbitrage_bybit' in strategy_settings:
+        strategy = strategy_settings['reverse_arbitrage_bybit'].get('strategy', [])
+        print('策略阶梯数量:', len(strategy))
+        for i, layer in enumerate(strategy):
+            print(f'阶梯 {i+1}:', layer)
+            
 except Exception as e:
     print('错误:', e)